@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+
+class PreferencesModelBackend(ModelBackend):
+    """ModelBackend that loads the session user together with their preferences.
+
+    Views and templates read ``request.user.preferences`` on most pages, so
+    joining the one-to-one row here saves a query per authenticated request.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username=username, password=password, **kwargs)
+        if user is None and password is not None:
+            # The stock ModelBackend listed after this one (for older sessions)
+            # would check the same credentials again, hashing the password twice
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            user = UserModel._default_manager.select_related('preferences').get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
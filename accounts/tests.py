@@ -1,3 +1,47 @@
+from unittest.mock import patch
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.backends import PreferencesModelBackend
+
+
+class PreferencesModelBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='u', email='u@example.com', password='x')
+
+    def test_get_user_loads_preferences(self):
+        with self.assertNumQueries(1):
+            user = PreferencesModelBackend().get_user(self.user.pk)
+            self.assertEqual(user.preferences.political_filter, 'balanced')
+
+    def test_get_user_missing_returns_none(self):
+        self.assertIsNone(PreferencesModelBackend().get_user(self.user.pk + 1000))
+
+    def test_login_session_uses_backend(self):
+        self.client.force_login(self.user)
+        resp = self.client.get('/accounts/preferences/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.wsgi_request.user.preferences.user_id, self.user.pk)
+
+    def test_failed_login_hashes_password_once(self):
+        for username in ('u', 'nobody'):
+            with self.subTest(username=username), patch.object(
+                MD5PasswordHasher, 'encode', autospec=True, side_effect=MD5PasswordHasher.encode
+            ) as encode:
+                self.assertIsNone(authenticate(username=username, password='wrong'))
+                self.assertEqual(encode.call_count, 1)
+
+    def test_sessions_from_the_stock_backend_still_resolve(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        resp = self.client.get('/accounts/preferences/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.wsgi_request.user.pk, self.user.pk)
+
+    def test_login_still_succeeds(self):
+        user = authenticate(username='u', password='x')
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.backend, 'accounts.backends.PreferencesModelBackend')
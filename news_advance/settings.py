@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 from pathlib import Path
 from decouple import config
 import os
+import sys
 
 # Load environment variables from .env file (optional)
 try:
@@ -36,6 +37,9 @@ DEBUG = config('DEBUG', default=True, cast=bool)
 
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1').split(',')
 
+# True when running under 'manage.py test'
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
 
 # Application definition
 
@@ -63,6 +67,25 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Optional: fail tests on N+1 query patterns when nplusone is installed
+if TESTING:
+    try:
+        import nplusone  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        INSTALLED_APPS.append('nplusone.ext.django')
+        MIDDLEWARE.insert(0, 'nplusone.ext.django.NPlusOneMiddleware')
+        NPLUSONE_RAISE = True
+        NPLUSONE_WHITELIST = [
+            # The session user's preferences are joined on purpose (see accounts.backends)
+            {'model': 'auth.User', 'field': 'preferences'},
+            # latest_news joins the analyses for the card badges; pages whose
+            # articles are all unanalyzed never read them
+            {'label': 'unused_eager_load', 'model': 'news_aggregator.NewsArticle', 'field': 'bias_analysis'},
+            {'label': 'unused_eager_load', 'model': 'news_aggregator.NewsArticle', 'field': 'sentiment_analysis'},
+        ]
+
 ROOT_URLCONF = 'news_advance.urls'
 
 TEMPLATES = [
@@ -114,6 +137,20 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# New logins use PreferencesModelBackend, which loads the session user with
+# preferences joined. ModelBackend stays listed so sessions created before it
+# still resolve; PreferencesModelBackend stops failed logins from reaching it,
+# so the password is hashed once. Drop it once those sessions have expired.
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.PreferencesModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# The test suite creates users with throwaway passwords; skip PBKDF2's
+# key stretching there so user creation and logins stay cheap.
+if TESTING:
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
@@ -194,4 +231,7 @@ LOGGING = {
 # ML Models Configuration
 SUMMARIZATION_MODEL_DIR = BASE_DIR / 'news_analysis' / 'ml_models' / 'summarization' / 'trained_model'
 SUMMARIZATION_BASE_MODEL = 'facebook/bart-base'  # Fallback if trained model not available
-USE_ML_SUMMARIZATION = True  # Set to False to always use Ollama instead
\ No newline at end of file
+USE_ML_SUMMARIZATION = True  # Set to False to always use Ollama instead
+
+# Extractive summarizer (news_aggregator.utils.summarize_text)
+SUMMARIZE_USE_NLTK_TOKENIZER = False  # Set to True to split sentences with NLTK Punkt instead of a regex
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-16 20:17
+
+import random
+
+import news_aggregator.models
+from django.db import migrations, models
+
+
+def assign_random_buckets(apps, schema_editor):
+    # AddField evaluates the callable default once, so existing rows share a bucket
+    NewsArticle = apps.get_model('news_aggregator', 'NewsArticle')
+    articles = list(NewsArticle.objects.only('id'))
+    for article in articles:
+        article.random_bucket = random.randrange(news_aggregator.models.RANDOM_BUCKET_COUNT)
+    NewsArticle.objects.bulk_update(articles, ['random_bucket'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news_aggregator', '0002_add_political_bias_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsarticle',
+            name='random_bucket',
+            field=models.PositiveSmallIntegerField(db_index=True, default=news_aggregator.models.random_bucket, editable=False),
+        ),
+        migrations.RunPython(assign_random_buckets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-16 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news_aggregator', '0003_newsarticle_random_bucket'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['-published_date'], name='newsarticle_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['source', '-published_date'], name='newsarticle_source_pub_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-16 20:24
+
+from django.db import migrations, models
+
+NEUTRAL_BIAS_RANGE = (-0.2, 0.2)
+
+
+def populate_is_neutral(apps, schema_editor):
+    NewsArticle = apps.get_model('news_aggregator', 'NewsArticle')
+    NewsArticle.objects.update(is_neutral=models.Case(
+        models.When(political_bias__isnull=True, then=True),
+        models.When(political_bias__range=NEUTRAL_BIAS_RANGE, then=True),
+        default=False,
+    ))
+    NewsArticle.objects.filter(source__political_bias__range=NEUTRAL_BIAS_RANGE).update(is_neutral=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news_aggregator', '0004_newsarticle_published_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsarticle',
+            name='is_neutral',
+            field=models.BooleanField(db_index=True, default=True, editable=False),
+        ),
+        migrations.RunPython(populate_is_neutral, migrations.RunPython.noop),
+    ]
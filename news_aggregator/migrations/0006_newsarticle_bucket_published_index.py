@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-16 20:55
+
+import news_aggregator.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news_aggregator', '0005_newsarticle_is_neutral'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='newsarticle',
+            name='random_bucket',
+            field=models.PositiveSmallIntegerField(default=news_aggregator.models.random_bucket, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='newsarticle',
+            index=models.Index(fields=['random_bucket', '-published_date'], name='newsarticle_bucket_pub_idx'),
+        ),
+    ]
@@ -1,7 +1,40 @@
+import random
+
+from django.core.cache import cache
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from django.contrib.auth.models import User
 
+# Number of random sampling buckets assigned to articles
+RANDOM_BUCKET_COUNT = 1000
+
+# Bias scores in this range count as neutral for the 'neutral_only' feed filter
+NEUTRAL_BIAS_RANGE = (-0.2, 0.2)
+
+# Cached (id, name) source list for the latest news filter dropdown
+SOURCE_CHOICES_CACHE_KEY = 'news_aggregator:source_choices'
+SOURCE_CHOICES_CACHE_TIMEOUT = 300
+
+# Cached ids of each source's most recent articles for the article detail sidebar
+SOURCE_RECENT_IDS_CACHE_TIMEOUT = 600
+
+
+def source_recent_ids_cache_key(source_id):
+    """Cache key for the recent article ids of a single source."""
+    return f'news_aggregator:source_recent_ids:{source_id}'
+
+
+def random_bucket():
+    """Pick a random sampling bucket for a new article."""
+    return random.randrange(RANDOM_BUCKET_COUNT)
+
+
+def is_neutral_bias(score):
+    """Whether a political bias score falls within NEUTRAL_BIAS_RANGE."""
+    return score is not None and NEUTRAL_BIAS_RANGE[0] <= score <= NEUTRAL_BIAS_RANGE[1]
+
 class NewsSource(models.Model):
     """Model for news sources (publications, websites, etc.)"""
     name = models.CharField(max_length=200)
@@ -19,6 +52,35 @@ class NewsSource(models.Model):
     def __str__(self):
         return self.name
 
+@receiver([post_save, post_delete], sender=NewsSource)
+def invalidate_source_choices(sender, instance, update_fields=None, **kwargs):
+    """Drop the cached source dropdown when a source is added, renamed or removed"""
+    # Score recalculations (update_fields=['reliability_score']) don't affect the dropdown
+    if update_fields is not None and 'name' not in update_fields:
+        return
+    cache.delete(SOURCE_CHOICES_CACHE_KEY)
+
+class NewsArticleQuerySet(models.QuerySet):
+    """Shared loading options for the article pages of both apps"""
+
+    def with_is_saved(self, user):
+        """
+        Annotate is_saved for the given user. The check runs as an EXISTS
+        subquery on the selected rows, so the user's saved article ids are
+        never loaded into Python. Anonymous users get the queryset unchanged.
+        """
+        if not user.is_authenticated:
+            return self
+        saved = UserSavedArticle.objects.filter(user=user, article=models.OuterRef('pk'))
+        return self.annotate(is_saved=models.Exists(saved))
+
+    def with_fallacy_detections(self):
+        """Prefetch fallacy detections with their fallacy, which pages read per detection"""
+        from news_analysis.models import LogicalFallacyDetection
+        return self.prefetch_related(
+            models.Prefetch('fallacy_detections', queryset=LogicalFallacyDetection.objects.select_related('fallacy'))
+        )
+
 class NewsArticle(models.Model):
     """Model for news articles collected from various sources"""
     title = models.CharField(max_length=255)
@@ -42,13 +104,62 @@ class NewsArticle(models.Model):
     # Flags for processing status
     is_analyzed = models.BooleanField(default=False)
     is_summarized = models.BooleanField(default=False)
+
+    # Random bucket (0-999) fixed at creation; rotating the buckets by a
+    # per-session offset gives a shuffled feed without ORDER BY RANDOM()
+    random_bucket = models.PositiveSmallIntegerField(default=random_bucket, editable=False)
+
+    # Denormalized 'neutral_only' filter: unanalyzed, or the article or its source
+    # has a neutral bias. Kept in sync by save() and by NewsSource saves.
+    is_neutral = models.BooleanField(default=True, db_index=True, editable=False)
+
+    objects = NewsArticleQuerySet.as_manager()
     
     class Meta:
         ordering = ['-published_date']
+        indexes = [
+            # Default newest-first listing (latest_news)
+            models.Index(fields=['-published_date'], name='newsarticle_published_idx'),
+            # Per-source listing and related articles (source_detail, article_detail)
+            models.Index(fields=['source', '-published_date'], name='newsarticle_source_pub_idx'),
+            # Range reads of the rotated 'diverse' feed (latest_news)
+            models.Index(fields=['random_bucket', '-published_date'], name='newsarticle_bucket_pub_idx'),
+        ]
     
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'political_bias', 'source', 'source_id'} & set(update_fields):
+            self.is_neutral = (
+                self.political_bias is None
+                or is_neutral_bias(self.political_bias)
+                or is_neutral_bias(self.source.political_bias)
+            )
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'is_neutral'}
+        super().save(*args, **kwargs)
+
+@receiver(post_save, sender=NewsSource)
+def sync_article_neutrality(sender, instance, created, update_fields=None, **kwargs):
+    """Re-derive NewsArticle.is_neutral for a source's articles when its bias may have changed"""
+    if created or (update_fields is not None and 'political_bias' not in update_fields):
+        return
+    if is_neutral_bias(instance.political_bias):
+        instance.articles.update(is_neutral=True)
+    else:
+        instance.articles.update(is_neutral=models.Case(
+            models.When(political_bias__isnull=True, then=True),
+            models.When(political_bias__range=NEUTRAL_BIAS_RANGE, then=True),
+            default=False,
+        ))
+
+@receiver([post_save, post_delete], sender=NewsArticle)
+def invalidate_source_recent_ids(sender, instance, **kwargs):
+    """Drop the cached recent article ids of the article's source"""
+    cache.delete(source_recent_ids_cache_key(instance.source_id))
+
 class UserSavedArticle(models.Model):
     """Model for articles saved by users"""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='saved_articles')
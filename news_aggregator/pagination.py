@@ -0,0 +1,76 @@
+"""
+Pagination helpers for article listings.
+"""
+from django.core.paginator import Paginator
+from django.db.models import Count, Q, Window
+from django.utils.functional import cached_property
+
+
+class WindowCountPaginator(Paginator):
+    """
+    Paginator for querysets that reads the total row count from a
+    COUNT(*) OVER () column on the page query itself, so a page costs one
+    query instead of a COUNT followed by the page SELECT. The regular COUNT
+    only runs when the requested page is empty or out of range.
+    """
+
+    def get_page(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number = 1
+
+        if number >= 1 and not self.orphans:
+            rows = self._fetch_page_rows(number)
+            if rows:
+                return self._get_page(rows, number, self)
+
+        # Empty or out-of-range page: let Paginator count and clamp as usual
+        return super().get_page(number)
+
+    def _fetch_page_rows(self, number):
+        bottom = (number - 1) * self.per_page
+        page_qs = self.object_list.annotate(pagination_total=Window(expression=Count('*')))
+        rows = list(page_qs[bottom:bottom + self.per_page])
+        if rows:
+            # Paginator.count is a cached_property; seed it from the window column
+            self.__dict__['count'] = rows[0].pagination_total
+        return rows
+
+
+class RotatedRows:
+    """
+    Read-only sequence over a queryset ordered by an integer column that
+    starts at a given value and wraps around: rows with field >= start come
+    first, then rows with field < start. Each half is read as a range on an
+    index led by field, so no query sorts the whole table. Paginate it with
+    the regular Paginator, which only needs count() and slicing.
+    """
+
+    def __init__(self, queryset, field, start, *ordering):
+        self.queryset = queryset
+        self.head_filter = Q(**{f'{field}__gte': start})
+        self.head = queryset.filter(self.head_filter).order_by(field, *ordering)
+        self.tail = queryset.filter(**{f'{field}__lt': start}).order_by(field, *ordering)
+
+    @cached_property
+    def _counts(self):
+        # Both halves are counted in one query
+        return self.queryset.aggregate(total=Count('pk'), head=Count('pk', filter=self.head_filter))
+
+    def count(self):
+        return self._counts['total']
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step is not None:
+            raise TypeError('RotatedRows only supports slicing without a step.')
+        start, stop = key.start or 0, key.stop
+        split = self._counts['head']
+        rows = list(self.head[start:stop]) if start < split else []
+        if stop is None or stop > split:
+            tail_stop = None if stop is None else stop - split
+            rows += list(self.tail[max(start - split, 0):tail_stop])
+        return rows
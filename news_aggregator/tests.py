@@ -1,66 +1,116 @@
-from django.test import TestCase, Client
+from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import patch
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
+
+from news_aggregator.models import NewsSource, NewsArticle, UserSavedArticle
+from news_aggregator.pagination import RotatedRows, WindowCountPaginator
+from news_aggregator.utils import (
+    check_url_accessibility,
+    clean_html,
+    compute_source_reliability,
+    extract_articles_bulk,
+    extract_main_image,
+    get_domain_from_url,
+    summarize_text,
+    update_source_reliability,
+)
+from news_analysis.models import (
+    BiasAnalysis,
+    SentimentAnalysis,
+    FactCheckResult,
+    LogicalFallacy,
+    LogicalFallacyDetection,
+)
+
+
+# These tests only issue GET requests against rendered pages, so the
+# CSRF/security/clickjacking layers are not exercised.
+TEST_MIDDLEWARE = [
+    m for m in settings.MIDDLEWARE
+    if m not in (
+        'django.middleware.security.SecurityMiddleware',
+        'django.middleware.common.CommonMiddleware',
+        'django.middleware.csrf.CsrfViewMiddleware',
+        'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    )
+]
 
-from news_aggregator.models import NewsSource, NewsArticle
-from news_analysis.models import FactCheckResult
+# nplusone's middleware reads NPLUSONE_RAISE from the wrapped settings object,
+# which under override_settings only holds the overridden names. Pass the
+# nplusone settings along so these classes still raise on N+1 queries.
+TEST_PAGE_SETTINGS = {
+    'MIDDLEWARE': TEST_MIDDLEWARE,
+    **{
+        name: getattr(settings, name)
+        for name in ('NPLUSONE_RAISE', 'NPLUSONE_WHITELIST')
+        if hasattr(settings, name)
+    },
+}
 
 
+@override_settings(**TEST_PAGE_SETTINGS)
 class ArticleDetailFactCheckUITests(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.source = NewsSource.objects.create(name='Test Source', url='https://example.com')
-        self.article = NewsArticle.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        # Create a user once; the post_save signal creates its preferences.
+        # Tests mutate cls.prefs (the instance cached on cls.user) so that the
+        # signal re-saving preferences on login does not revert the change.
+        cls.user = User.objects.create_user(username='u', email='u@example.com', password='x')
+        cls.prefs = cls.user.preferences
+        cls.source = NewsSource.objects.create(name='Test Source', url='https://example.com')
+        cls.article = NewsArticle.objects.create(
             title='Test Article',
-            source=self.source,
+            source=cls.source,
             url='https://example.com/a1',
-            content='This is some article content used for testing.'
+            content='This is some article content used for testing.',
+            # Analyzed so the Fact Checks panel renders
+            is_analyzed=True,
         )
-        # Create a user
-        self.user = User.objects.create_user(username='u', email='u@example.com', password='x')
+        cls.article_detail_url = reverse('news_aggregator:article_detail', kwargs={'article_id': cls.article.id})
+        cls.signup_url = reverse('accounts:signup')
+        cls.login_url = reverse('accounts:login')
+        cls.preferences_url = reverse('accounts:preferences')
 
     def test_unauthenticated_user_sees_prompt(self):
-        # Mark as analyzed so the Fact Checks panel can render
-        self.article.is_analyzed = True
-        self.article.save(update_fields=['is_analyzed'])
-        url = reverse('news_aggregator:article_detail', kwargs={'article_id': self.article.id})
-        resp = self.client.get(url)
-        self.assertContains(resp, 'Want to see fact-checks?')
-        self.assertContains(resp, reverse('accounts:signup'))
-        self.assertContains(resp, reverse('accounts:login'))
+        resp = self.client.get(self.article_detail_url)
+        self.assertEqual(resp.status_code, 200)
+        body = resp.content.decode()
+        for needle in ('Want to see fact-checks?', self.signup_url, self.login_url):
+            self.assertIn(needle, body)
 
     def test_authenticated_fact_checks_disabled_prompt(self):
-        # Ensure preference exists and disable
-        prefs = self.user.preferences
-        prefs.enable_fact_check = False
-        prefs.save()
-        # Mark as analyzed
-        self.article.is_analyzed = True
-        self.article.save(update_fields=['is_analyzed'])
-
-        self.client.login(username='u', password='x')
-        url = reverse('news_aggregator:article_detail', kwargs={'article_id': self.article.id})
-        resp = self.client.get(url)
-        self.assertContains(resp, 'Fact-checking is currently disabled')
-        self.assertContains(resp, reverse('accounts:preferences'))
+        self.prefs.enable_fact_check = False
+        self.prefs.save(update_fields=['enable_fact_check'])
+
+        self.client.force_login(self.user)
+        resp = self.client.get(self.article_detail_url)
+        self.assertEqual(resp.status_code, 200)
+        body = resp.content.decode()
+        for needle in ('Fact-checking is currently disabled', self.preferences_url):
+            self.assertIn(needle, body)
 
     def test_authenticated_enabled_no_fact_checks_message(self):
-        prefs = self.user.preferences
-        prefs.enable_fact_check = True
-        prefs.save()
-        # Mark as analyzed
-        self.article.is_analyzed = True
-        self.article.save(update_fields=['is_analyzed'])
-        self.client.login(username='u', password='x')
-        url = reverse('news_aggregator:article_detail', kwargs={'article_id': self.article.id})
-        resp = self.client.get(url)
+        self.prefs.enable_fact_check = True
+        self.prefs.save(update_fields=['enable_fact_check'])
+        self.client.force_login(self.user)
+        resp = self.client.get(self.article_detail_url)
         # No FactCheckResult exists, should see info alert
         self.assertContains(resp, 'No fact-checks are available for this article yet')
 
     def test_authenticated_enabled_with_fact_checks_shows_accordion(self):
-        prefs = self.user.preferences
-        prefs.enable_fact_check = True
-        prefs.save()
+        self.prefs.enable_fact_check = True
+        self.prefs.save(update_fields=['enable_fact_check'])
         # Create a fact-check
         FactCheckResult.objects.create(
             article=self.article,
@@ -69,11 +119,663 @@ class ArticleDetailFactCheckUITests(TestCase):
             explanation='An explanation',
             sources='https://example.org',
         )
-        # Mark as analyzed
-        self.article.is_analyzed = True
-        self.article.save(update_fields=['is_analyzed'])
-        self.client.login(username='u', password='x')
-        url = reverse('news_aggregator:article_detail', kwargs={'article_id': self.article.id})
-        resp = self.client.get(url)
-        self.assertContains(resp, 'Fact Checks')
-        self.assertContains(resp, 'A verifiable claim')
+        self.client.force_login(self.user)
+        resp = self.client.get(self.article_detail_url)
+        self.assertEqual(resp.status_code, 200)
+        body = resp.content.decode()
+        for needle in ('Fact Checks', 'A verifiable claim'):
+            self.assertIn(needle, body)
+
+    def test_fact_check_panel_query_count_is_constant(self):
+        # Rendering more fact-checks must not add queries (guards against N+1)
+        self.prefs.enable_fact_check = True
+        self.prefs.save(update_fields=['enable_fact_check'])
+        self.client.force_login(self.user)
+
+        def create_fact_checks(start, stop):
+            for i in range(start, stop):
+                FactCheckResult.objects.create(
+                    article=self.article,
+                    claim=f'Claim number {i} in the article.',
+                    rating='half_true',
+                )
+
+        create_fact_checks(0, 1)
+        # Warm the per-source related article cache so both requests hit it
+        self.client.get(self.article_detail_url)
+        with CaptureQueriesContext(connection) as baseline:
+            self.client.get(self.article_detail_url)
+
+        create_fact_checks(1, 6)
+        with self.assertNumQueries(len(baseline.captured_queries)):
+            resp = self.client.get(self.article_detail_url)
+        self.assertContains(resp, 'Claim number 5')
+
+
+@override_settings(**TEST_PAGE_SETTINGS)
+class SavedArticleFlagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader', password='x')
+        other = User.objects.create_user(username='other', password='x')
+        cls.source = NewsSource.objects.create(name='Saved Source', url='https://saved.example.com')
+        cls.saved, cls.unsaved, cls.saved_by_other = [
+            NewsArticle.objects.create(
+                title=f'Article {i}', source=cls.source, url=f'https://saved.example.com/{i}', content='x'
+            )
+            for i in range(3)
+        ]
+        UserSavedArticle.objects.create(user=cls.user, article=cls.saved)
+        UserSavedArticle.objects.create(user=other, article=cls.saved_by_other)
+        cls.latest_url = reverse('news_aggregator:latest')
+        cls.source_detail_url = reverse('news_aggregator:source_detail', kwargs={'source_id': cls.source.id})
+
+    def assert_saved_flags(self, url):
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        flags = {article.pk: article.is_saved for article in response.context['page_obj']}
+        self.assertEqual(flags, {self.saved.pk: True, self.unsaved.pk: False, self.saved_by_other.pk: False})
+
+    def test_latest_news_flags_saved_articles(self):
+        self.assert_saved_flags(self.latest_url)
+
+    def test_source_detail_flags_saved_articles(self):
+        self.assert_saved_flags(self.source_detail_url)
+
+    def test_save_article_toggles_and_redirects(self):
+        self.client.force_login(self.user)
+        url = reverse('news_aggregator:save_article_by_id', kwargs={'article_id': self.saved.pk})
+        response = self.client.get(url, {'next': 'news_aggregator:latest'})
+        self.assertRedirects(response, self.latest_url)
+        self.assertFalse(UserSavedArticle.objects.filter(user=self.user, article=self.saved).exists())
+
+        self.client.get(url)
+        self.assertTrue(UserSavedArticle.objects.filter(user=self.user, article=self.saved).exists())
+
+    def test_save_article_redirect_targets(self):
+        self.client.force_login(self.user)
+        url = reverse('news_aggregator:save_article_by_id', kwargs={'article_id': self.unsaved.pk})
+        detail_url = reverse('news_aggregator:article_detail', kwargs={'article_id': self.unsaved.pk})
+        cases = (
+            ({'next': 'news_aggregator:source_detail', 'source_id': self.source.pk}, self.source_detail_url),
+            ({'next': 'news_aggregator:source_detail'}, reverse('news_aggregator:source_list')),
+            ({'next': 'https://evil.example.com'}, detail_url),
+            ({}, detail_url),
+        )
+        for params, expected in cases:
+            with self.subTest(params=params):
+                self.assertRedirects(self.client.get(url, params), expected, fetch_redirect_response=False)
+
+    def test_article_detail_flags_saved_article(self):
+        self.client.force_login(self.user)
+        for article, saved in ((self.saved, True), (self.unsaved, False), (self.saved_by_other, False)):
+            url = reverse('news_aggregator:article_detail', kwargs={'article_id': article.pk})
+            self.assertIs(self.client.get(url).context['user_saved'], saved)
+
+    def test_anonymous_user_pages_render(self):
+        for url in (self.latest_url, self.source_detail_url):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class LatestNewsFullMiddlewareTests(TestCase):
+    # Runs on the project's MIDDLEWARE, including nplusone when it is installed
+    def test_unanalyzed_articles_render(self):
+        source = NewsSource.objects.create(name='Plain Source', url='https://plain.example.com')
+        NewsArticle.objects.create(title='Not analyzed yet', source=source, url='https://plain.example.com/1', content='x')
+        response = self.client.get(reverse('news_aggregator:latest'))
+        self.assertContains(response, 'Not analyzed yet')
+
+
+class SaveArticleAjaxTests(TestCase):
+    # POSTs run on the full middleware stack, unlike the GET-only classes
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='ajax-reader', password='x')
+        other = User.objects.create_user(username='ajax-other', password='x')
+        source = NewsSource.objects.create(name='Ajax Source', url='https://ajax.example.com')
+        cls.saved, cls.unsaved, cls.saved_by_other = [
+            NewsArticle.objects.create(
+                title=f'Ajax {i}', source=source, url=f'https://ajax.example.com/{i}', content='x'
+            )
+            for i in range(3)
+        ]
+        UserSavedArticle.objects.create(user=cls.user, article=cls.saved)
+        UserSavedArticle.objects.create(user=other, article=cls.saved_by_other)
+
+    def test_save_article_ajax_toggles(self):
+        self.client.force_login(self.user)
+        url = reverse('news_aggregator:save_article')
+        response = self.client.post(url, {'article_id': self.unsaved.pk})
+        self.assertEqual(response.json()['saved'], True)
+        self.assertTrue(UserSavedArticle.objects.filter(user=self.user, article=self.unsaved).exists())
+
+        response = self.client.post(url, {'article_id': self.unsaved.pk})
+        self.assertEqual(response.json()['saved'], False)
+        self.assertFalse(UserSavedArticle.objects.filter(user=self.user, article=self.unsaved).exists())
+        # Unsaving only touches the requesting user's rows
+        self.assertTrue(UserSavedArticle.objects.filter(article=self.saved_by_other).exists())
+
+    def test_save_article_ajax_tolerates_concurrent_save(self):
+        # Another request saved the article between this request's DELETE and INSERT
+        self.client.force_login(self.user)
+        with patch('django.db.models.query.QuerySet.delete', return_value=(0, {})):
+            response = self.client.post(reverse('news_aggregator:save_article'), {'article_id': self.saved.pk})
+        self.assertEqual(response.json()['saved'], True)
+        self.assertEqual(UserSavedArticle.objects.filter(user=self.user, article=self.saved).count(), 1)
+
+
+@override_settings(**TEST_PAGE_SETTINGS)
+class RelatedArticlesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.source = NewsSource.objects.create(name='Related Source', url='https://related.example.com')
+        cls.other_source = NewsSource.objects.create(name='Other Source', url='https://other.example.com')
+        now = timezone.now()
+        cls.articles = [
+            NewsArticle.objects.create(
+                title=f'Related {i}', source=cls.source, url=f'https://related.example.com/{i}',
+                content='x', published_date=now - timedelta(hours=i),
+            )
+            for i in range(7)
+        ]
+        NewsArticle.objects.create(
+            title='Elsewhere', source=cls.other_source, url='https://other.example.com/1', content='x'
+        )
+
+    def setUp(self):
+        # Rolled-back articles don't invalidate the cached ids
+        cache.clear()
+
+    def related_titles(self, article):
+        url = reverse('news_aggregator:article_detail', kwargs={'article_id': article.pk})
+        return [related.title for related in self.client.get(url).context['related_articles']]
+
+    def test_lists_latest_from_same_source_excluding_current(self):
+        self.assertEqual(self.related_titles(self.articles[0]), [f'Related {i}' for i in range(1, 6)])
+        self.assertEqual(self.related_titles(self.articles[6]), [f'Related {i}' for i in range(5)])
+        self.assertEqual(self.related_titles(self.articles[2]), ['Related 0', 'Related 1', 'Related 3', 'Related 4', 'Related 5'])
+
+    def test_recent_ids_are_cached_until_an_article_is_saved(self):
+        with CaptureQueriesContext(connection) as uncached:
+            self.related_titles(self.articles[0])
+        with self.assertNumQueries(len(uncached.captured_queries) - 1):
+            self.related_titles(self.articles[0])
+
+        NewsArticle.objects.create(
+            title='Breaking', source=self.source, url='https://related.example.com/new', content='x'
+        )
+        self.assertEqual(self.related_titles(self.articles[0])[0], 'Breaking')
+
+
+@override_settings(**TEST_PAGE_SETTINGS)
+class LatestNewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='diverse', password='x')
+        cls.prefs = cls.user.preferences
+        cls.source = NewsSource.objects.create(name='Latest Source', url='https://latest.example.com')
+        cls.articles = [
+            NewsArticle.objects.create(
+                title=f'Latest {i}', source=cls.source, url=f'https://latest.example.com/{i}', content='x'
+            )
+            for i in range(4)
+        ]
+        cls.latest_url = reverse('news_aggregator:latest')
+
+    def setUp(self):
+        # The source dropdown is cached, and rolled-back sources don't invalidate it
+        cache.clear()
+
+    def test_source_dropdown_is_cached_until_sources_change(self):
+        def dropdown_names():
+            return [source.name for source in self.client.get(self.latest_url).context['sources']]
+
+        with CaptureQueriesContext(connection) as cold:
+            self.assertEqual(dropdown_names(), ['Latest Source'])
+        with self.assertNumQueries(len(cold.captured_queries) - 1):
+            self.client.get(self.latest_url)
+
+        # Reliability updates keep the cached list; renames drop it
+        self.source.reliability_score = 42.0
+        self.source.save(update_fields=['reliability_score'])
+        NewsSource.objects.filter(pk=self.source.pk).update(name='Not Yet Visible')
+        self.assertEqual(dropdown_names(), ['Latest Source'])
+        self.source.name = 'Renamed Source'
+        self.source.save()
+        self.assertEqual(dropdown_names(), ['Renamed Source'])
+
+    def test_rendered_fragments_are_cached_until_their_inputs_change(self):
+        article = self.articles[0]
+        self.assertContains(self.client.get(self.latest_url), 'Latest 0')
+
+        # The card is keyed on what it renders, so saves that skip last_updated
+        # (update_fields, as the summarizer does) and bulk updates show up too
+        article.summary = 'Freshly summarized text'
+        article.is_summarized = True
+        article.save(update_fields=['summary', 'is_summarized'])
+        self.assertContains(self.client.get(self.latest_url), 'Freshly summarized text')
+        NewsArticle.objects.filter(pk=article.pk).update(title='Edited Title')
+        self.assertContains(self.client.get(self.latest_url), 'Edited Title')
+
+        # Renaming the source refreshes the dropdown and every card naming it
+        self.source.name = 'Renamed Source'
+        self.source.save()
+        response = self.client.get(self.latest_url)
+        self.assertNotContains(response, 'Latest Source')
+        self.assertContains(response, 'Renamed Source', count=5)
+
+        # The save buttons are rendered per user, outside the cached card
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(self.latest_url), 'save-article-btn', count=4)
+
+    def test_diverse_filter_rotates_buckets_per_session(self):
+        for bucket, article in zip((700, 5, 300, 5), self.articles):
+            article.random_bucket = bucket
+            article.save(update_fields=['random_bucket'])
+        self.prefs.political_filter = 'diverse'
+        self.prefs.save(update_fields=['political_filter'])
+        self.client.force_login(self.user)
+
+        with patch('news_aggregator.views.random_bucket', return_value=300):
+            response = self.client.get(self.latest_url)
+        # Buckets from the offset come first, wrapping around to the lower ones;
+        # equal buckets fall back to newest first
+        expected = [self.articles[2], self.articles[0], self.articles[3], self.articles[1]]
+        self.assertEqual(list(response.context['page_obj']), expected)
+
+        # The offset is kept for the rest of the session
+        with patch('news_aggregator.views.random_bucket', return_value=0) as draw:
+            response = self.client.get(self.latest_url)
+        draw.assert_not_called()
+        self.assertEqual(list(response.context['page_obj']), expected)
+
+        # A new session starts elsewhere
+        self.client.logout()
+        self.client.force_login(self.user)
+        with patch('news_aggregator.views.random_bucket', return_value=0):
+            response = self.client.get(self.latest_url)
+        expected = [self.articles[3], self.articles[1], self.articles[2], self.articles[0]]
+        self.assertEqual(list(response.context['page_obj']), expected)
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+    def test_diverse_filter_reads_bucket_index_without_sorting(self):
+        self.prefs.political_filter = 'diverse'
+        self.prefs.save(update_fields=['political_filter'])
+        self.client.force_login(self.user)
+        with patch('news_aggregator.views.random_bucket', return_value=500), \
+                CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.latest_url)
+        page_queries = [q['sql'] for q in ctx.captured_queries if 'ORDER BY "news_aggregator_newsarticle"."random_bucket"' in q['sql']]
+        self.assertTrue(page_queries)
+        with connection.cursor() as cursor:
+            for sql in page_queries:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = ' '.join(row[-1] for row in cursor.fetchall())
+                self.assertIn('USING INDEX newsarticle_bucket_pub_idx (random_bucket', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_query_count_is_constant_per_page(self):
+        def add_analyzed_articles(source, count):
+            for i in range(count):
+                article = NewsArticle.objects.create(
+                    title=f'{source.name} {i}', source=source, url=f'{source.url}/analyzed-{i}', content='x', is_analyzed=True
+                )
+                BiasAnalysis.objects.create(article=article, political_leaning='center', bias_score=0.0, confidence=0.9)
+                SentimentAnalysis.objects.create(
+                    article=article, sentiment_score=0.5, positive_score=0.6, negative_score=0.1, neutral_score=0.3
+                )
+
+        add_analyzed_articles(self.source, 1)
+        with CaptureQueriesContext(connection) as baseline:
+            self.client.get(self.latest_url)
+
+        other = NewsSource.objects.create(name='Other Latest', url='https://other-latest.example.com')
+        add_analyzed_articles(other, 5)
+        with self.assertNumQueries(len(baseline.captured_queries)):
+            response = self.client.get(self.latest_url)
+        self.assertContains(response, 'Other Latest')
+
+    def test_preferences_are_loaded_with_the_user(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.latest_url)
+        preference_queries = [q['sql'] for q in ctx.captured_queries if 'accounts_userpreferences' in q['sql']]
+        # Only the session user lookup, which joins the preferences row
+        self.assertEqual(len(preference_queries), 1)
+        self.assertIn('auth_user', preference_queries[0])
+
+    def test_neutral_only_filter_uses_article_and_source_bias(self):
+        slanted = NewsSource.objects.create(name='Slanted', url='https://slanted.example.com', political_bias=0.8)
+        biases = {'unanalyzed': None, 'neutral': 0.1, 'left': -0.6}
+        articles = {
+            name: NewsArticle.objects.create(
+                title=f'Slanted {name}', source=slanted, url=f'https://slanted.example.com/{name}',
+                content='x', political_bias=bias,
+            )
+            for name, bias in biases.items()
+        }
+        self.assertEqual({name: a.is_neutral for name, a in articles.items()},
+                         {'unanalyzed': True, 'neutral': True, 'left': False})
+
+        self.prefs.political_filter = 'neutral_only'
+        self.prefs.save(update_fields=['political_filter'])
+        self.client.force_login(self.user)
+        listed = set(self.client.get(self.latest_url).context['page_obj'])
+        self.assertNotIn(articles['left'], listed)
+        self.assertIn(articles['neutral'], listed)
+
+        # A neutral source makes all of its articles pass, and back again
+        slanted.political_bias = 0.0
+        slanted.save(update_fields=['political_bias'])
+        self.assertTrue(NewsArticle.objects.get(pk=articles['left'].pk).is_neutral)
+        slanted.political_bias = 0.5
+        slanted.save()
+        self.assertFalse(NewsArticle.objects.get(pk=articles['left'].pk).is_neutral)
+        self.assertTrue(NewsArticle.objects.get(pk=articles['unanalyzed'].pk).is_neutral)
+
+        # Article bias updates through save(update_fields=...) refresh the flag too
+        left = articles['left']
+        left.political_bias = 0.0
+        left.save(update_fields=['political_bias'])
+        self.assertTrue(NewsArticle.objects.get(pk=left.pk).is_neutral)
+
+    def test_cards_render_content_preview_without_loading_content(self):
+        article = self.articles[0]
+        article.content = ' '.join(f'word{i}' for i in range(2000))
+        article.save(update_fields=['content'])
+        source_detail_url = reverse('news_aggregator:source_detail', kwargs={'source_id': self.source.id})
+        for url in (self.latest_url, source_detail_url):
+            response = self.client.get(url)
+            self.assertTrue(all('content' in a.get_deferred_fields() for a in response.context['page_obj']))
+            self.assertContains(response, 'word0 word1')
+            self.assertContains(response, 'word29 …')
+            self.assertNotContains(response, 'word30')
+
+    def test_new_articles_get_a_bucket(self):
+        for article in self.articles:
+            self.assertIn(article.random_bucket, range(1000))
+
+
+class WindowCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        source = NewsSource.objects.create(name='Paged Source', url='https://paged.example.com')
+        for i in range(5):
+            NewsArticle.objects.create(title=f'Paged {i}', source=source, url=f'https://paged.example.com/{i}', content='x')
+        cls.articles = NewsArticle.objects.order_by('pk')
+
+    def test_page_and_count_in_one_query(self):
+        paginator = WindowCountPaginator(self.articles, 2)
+        with self.assertNumQueries(1):
+            page = paginator.get_page('2')
+            self.assertEqual([a.title for a in page], ['Paged 2', 'Paged 3'])
+            self.assertEqual(paginator.count, 5)
+            self.assertEqual(paginator.num_pages, 3)
+            self.assertTrue(page.has_next())
+
+    def test_out_of_range_and_invalid_pages_fall_back(self):
+        paginator = WindowCountPaginator(self.articles, 2)
+        self.assertEqual([a.title for a in paginator.get_page(99)], ['Paged 4'])
+        self.assertEqual(paginator.get_page('abc').number, 1)
+        empty = WindowCountPaginator(NewsArticle.objects.none(), 2).get_page(1)
+        self.assertEqual((empty.number, len(empty)), (1, 0))
+
+
+class RotatedRowsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        source = NewsSource.objects.create(name='Rotated Source', url='https://rotated.example.com')
+        for i, bucket in enumerate((40, 10, 30, 20, 50)):
+            NewsArticle.objects.create(
+                title=f'Rotated {bucket}', source=source, url=f'https://rotated.example.com/{i}',
+                content='x', random_bucket=bucket,
+            )
+
+    def titles(self, page):
+        return [article.title for article in page]
+
+    def test_pages_wrap_around_the_start(self):
+        rows = RotatedRows(NewsArticle.objects.all(), 'random_bucket', 30, '-published_date')
+        paginator = Paginator(rows, 2)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.titles(paginator.get_page(1)), ['Rotated 30', 'Rotated 40'])
+            self.assertEqual(paginator.count, 5)
+        # Page 2 spans the wrap: one row from each half
+        self.assertEqual(self.titles(paginator.get_page(2)), ['Rotated 50', 'Rotated 10'])
+        self.assertEqual(self.titles(paginator.get_page(3)), ['Rotated 20'])
+
+    def test_start_outside_the_buckets(self):
+        for start, expected in ((0, [10, 20, 30, 40, 50]), (99, [10, 20, 30, 40, 50])):
+            rows = RotatedRows(NewsArticle.objects.all(), 'random_bucket', start, '-published_date')
+            self.assertEqual(self.titles(rows[0:5]), [f'Rotated {bucket}' for bucket in expected])
+
+
+class HtmlUtilsTests(SimpleTestCase):
+    def test_clean_html_strips_unwanted_elements(self):
+        html = (
+            '<html><head><meta charset="utf-8"><style>p {}</style></head>'
+            '<body><p>Keep me</p><script>alert(1)</script><!-- note -->'
+            '<iframe src="x"></iframe><noscript>js off</noscript></body></html>'
+        )
+        cleaned = clean_html(html)
+        self.assertIn('<p>Keep me</p>', cleaned)
+        for dropped in ('<script', '<style', '<iframe', '<meta', '<noscript', 'alert(1)', 'note'):
+            self.assertNotIn(dropped, cleaned)
+
+    def test_clean_html_keeps_text_after_removed_elements(self):
+        cleaned = clean_html('<div>before<script>x()</script> after<!-- c --> end</div>')
+        self.assertIn('before after end', cleaned)
+        self.assertNotIn('x()', cleaned)
+
+    def test_clean_html_keeps_fragments_unwrapped(self):
+        for fragment in ('<div>x</div>', '<p>a</p><p>b</p>', 'lead <b>bold</b> tail &amp; more'):
+            with self.subTest(fragment=fragment):
+                self.assertEqual(clean_html(fragment), fragment)
+        self.assertEqual(clean_html('<div>x<script>y()</script></div>'), '<div>x</div>')
+
+    def test_clean_html_keeps_doctype(self):
+        html = '<!DOCTYPE html><html><head><title>t</title></head><body><p>x</p></body></html>'
+        self.assertEqual(clean_html(html), '<!DOCTYPE html>\n' + html[len('<!DOCTYPE html>'):])
+        self.assertFalse(clean_html('<html><body><p>x</p></body></html>').startswith('<!DOCTYPE'))
+
+    def test_clean_html_accepts_xml_declaration(self):
+        html = (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<html xmlns="http://www.w3.org/1999/xhtml"><body>'
+            '<p>Caf\u00e9 news</p><script>x()</script></body></html>'
+        )
+        cleaned = clean_html(html)
+        self.assertIn('<p>Caf\u00e9 news</p>', cleaned)
+        self.assertNotIn('x()', cleaned)
+
+    def test_clean_html_empty(self):
+        self.assertEqual(clean_html(''), '')
+        self.assertEqual(clean_html('   '), '')
+
+    def test_extract_main_image_prefers_og_image(self):
+        html = (
+            '<html><head><meta property="og:image" content="https://example.com/og.jpg">'
+            '<meta name="twitter:image" content="https://example.com/tw.jpg"></head>'
+            '<body><img src="https://example.com/big.jpg" width="800" height="600"></body></html>'
+        )
+        self.assertEqual(extract_main_image(html, 'https://example.com'), 'https://example.com/og.jpg')
+
+    def test_extract_main_image_accepts_xml_declaration(self):
+        html = (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<html xmlns="http://www.w3.org/1999/xhtml"><head>'
+            '<meta property="og:image" content="https://example.com/x.jpg"/></head></html>'
+        )
+        self.assertEqual(extract_main_image(html, 'https://example.com'), 'https://example.com/x.jpg')
+
+    def test_extract_main_image_falls_back_to_twitter_image(self):
+        html = '<html><head><meta name="twitter:image" content="https://example.com/tw.jpg"></head></html>'
+        self.assertEqual(extract_main_image(html, 'https://example.com'), 'https://example.com/tw.jpg')
+
+    def test_extract_main_image_picks_largest_content_image(self):
+        html = (
+            '<html><body>'
+            '<img src="https://example.com/site-logo.png" width="2000" height="2000">'
+            '<img src="https://example.com/small.jpg" width="100" height="100">'
+            '<img src="https://example.com/large.jpg" width="800" height="600">'
+            '<img src="https://example.com/unsized.jpg">'
+            '<img alt="no source">'
+            '</body></html>'
+        )
+        self.assertEqual(extract_main_image(html, 'https://example.com'), 'https://example.com/large.jpg')
+
+    def test_extract_main_image_first_image_wins_ties(self):
+        html = (
+            '<img src="https://example.com/first.jpg">'
+            '<img src="https://example.com/second.jpg">'
+        )
+        self.assertEqual(extract_main_image(html, 'https://example.com'), 'https://example.com/first.jpg')
+
+    def test_extract_main_image_none(self):
+        self.assertIsNone(extract_main_image('', 'https://example.com'))
+        self.assertIsNone(extract_main_image('<p>No images</p>', 'https://example.com'))
+        self.assertIsNone(extract_main_image('   ', 'https://example.com'))
+
+    def test_html_helpers_cache_results_by_content(self):
+        html = '<html><body><p>cached page</p><img src="https://example.com/c.jpg"></body></html>'
+        cache.clear()
+        # The mocked results must not leak into other tests
+        self.addCleanup(cache.clear)
+        with patch('news_aggregator.utils._clean_html', return_value='<p>x</p>') as mock_clean, \
+                patch('news_aggregator.utils._extract_main_image', return_value=None) as mock_image:
+            for _ in range(2):
+                self.assertEqual(clean_html(html), '<p>x</p>')
+                self.assertIsNone(extract_main_image(html, 'https://example.com'))
+            clean_html(html + ' ')
+        self.assertEqual(mock_clean.call_count, 2)
+        self.assertEqual(mock_image.call_count, 1)
+
+    def test_get_domain_from_url_strips_www(self):
+        self.assertEqual(get_domain_from_url('https://www.bbc.com/news/world'), 'bbc.com')
+        self.assertEqual(get_domain_from_url('http://example.com?q=1'), 'example.com')
+
+    def test_get_domain_from_url_matches_urlparse_netloc(self):
+        self.assertEqual(get_domain_from_url('http://user@news.example.com:8080/a'), 'user@news.example.com:8080')
+        self.assertEqual(get_domain_from_url('ftp://www.example.com/file'), 'example.com')
+        self.assertEqual(get_domain_from_url('http://[::1]:8000/path'), '[::1]:8000')
+        self.assertEqual(get_domain_from_url('example.com/path'), '')
+
+    def test_summarize_text_returns_short_text_unchanged(self):
+        text = 'The council met on Monday. "We agreed," the mayor said. 3 motions passed.'
+        self.assertEqual(summarize_text(text, max_sentences=3), text)
+        self.assertEqual(summarize_text('', max_sentences=3), '')
+
+    @patch('news_aggregator.utils._HTTP_SESSION.head')
+    def test_check_url_accessibility_uses_shared_session(self, mock_head):
+        mock_head.return_value.status_code = 200
+        self.assertTrue(check_url_accessibility('https://example.com/a'))
+        mock_head.return_value.status_code = 404
+        self.assertFalse(check_url_accessibility('https://example.com/b'))
+        mock_head.side_effect = requests.ConnectionError
+        self.assertFalse(check_url_accessibility('https://example.com/c'))
+        mock_head.assert_called_with('https://example.com/c', timeout=(2, 3), allow_redirects=True)
+
+    @patch('news_aggregator.utils._HTTP_SESSION.get')
+    @patch('news_aggregator.utils._HTTP_SESSION.head')
+    def test_check_url_accessibility_falls_back_to_get(self, mock_head, mock_get):
+        mock_head.return_value.status_code = 405
+        mock_get.return_value.status_code = 206
+        self.assertTrue(check_url_accessibility('https://example.com/a'))
+        mock_get.assert_called_once_with(
+            'https://example.com/a', timeout=(2, 3), allow_redirects=True, headers={'Range': 'bytes=0-0'}, stream=True
+        )
+        mock_get.return_value.close.assert_called_once_with()
+
+        mock_head.return_value.status_code = 404
+        self.assertFalse(check_url_accessibility('https://example.com/b'))
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('news_aggregator.utils.extract_article_content')
+    def test_extract_articles_bulk_preserves_order(self, mock_extract):
+        mock_extract.side_effect = lambda url, timeout: None if url.endswith('bad') else {'url': url}
+        urls = ['https://example.com/1', 'https://example.com/bad', 'https://example.com/3']
+        self.assertEqual(
+            extract_articles_bulk(urls, max_workers=2),
+            [{'url': urls[0]}, None, {'url': urls[2]}],
+        )
+        self.assertEqual(extract_articles_bulk([]), [])
+
+
+class SourceReliabilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.source = NewsSource.objects.create(name='Scored Source', url='https://scored.example.com')
+        cls.articles = [
+            NewsArticle.objects.create(
+                title=f'Article {i}',
+                source=cls.source,
+                url=f'https://scored.example.com/a{i}',
+                content='Content',
+            )
+            for i in range(3)
+        ]
+        a1, a2, _ = cls.articles
+        FactCheckResult.objects.create(article=a1, claim='c1', rating='true', explanation='', confidence=0.9)
+        FactCheckResult.objects.create(article=a2, claim='c2', rating='half_true', explanation='')
+        FactCheckResult.objects.create(article=a1, claim='c3', rating='false', explanation='', confidence=0.5)
+        BiasAnalysis.objects.create(article=a1, bias_score=0.2, confidence=0.8)
+        BiasAnalysis.objects.create(article=a2, bias_score=-0.2, confidence=0.8)
+        fallacy = LogicalFallacy.objects.create(name='Scoring Test Fallacy', description='d')
+        LogicalFallacyDetection.objects.create(article=a1, fallacy=fallacy)
+        LogicalFallacyDetection.objects.create(article=a2, fallacy=fallacy)
+
+    def setUp(self):
+        # Scores are cached per source id, and ids can repeat across rolled-back tests
+        cache.clear()
+
+    def test_compute_source_reliability(self):
+        # fact checks avg (1.0 + 0.6 + 0.0) / 3, bias pstdev 0.2, 2 fallacies over 3 articles
+        fact_part = (1.0 + 0.6 + 0.0) / 3 * 100.0
+        bias_part = (1.0 - 0.2) * 100.0
+        fallacy_part = 100.0 - (2 / 3) / 3.0 * 20.0
+        expected = 0.6 * fact_part + 0.2 * bias_part + 0.2 * fallacy_part
+        self.assertAlmostEqual(compute_source_reliability(self.source), expected, places=6)
+
+    def test_compute_source_reliability_ignores_other_sources(self):
+        expected = compute_source_reliability(self.source)
+        cache.clear()
+        other = NewsSource.objects.create(name='Other Source', url='https://other.example.com')
+        article = NewsArticle.objects.create(title='Other', source=other, url='https://other.example.com/a', content='x')
+        FactCheckResult.objects.create(article=article, claim='other', rating='pants_on_fire', explanation='')
+        with self.assertNumQueries(4):
+            self.assertAlmostEqual(compute_source_reliability(self.source), expected, places=6)
+
+    def test_compute_source_reliability_without_articles(self):
+        empty = NewsSource.objects.create(name='Empty Source', url='https://empty.example.com')
+        self.assertEqual(compute_source_reliability(empty), 0.0)
+
+    def test_compute_source_reliability_defaults_without_analyses(self):
+        source = NewsSource.objects.create(name='Fresh Source', url='https://fresh.example.com')
+        NewsArticle.objects.create(title='Fresh', source=source, url='https://fresh.example.com/a', content='x')
+        # No fact checks (50), no bias analyses (60), no fallacies (100)
+        self.assertAlmostEqual(compute_source_reliability(source), 0.6 * 50.0 + 0.2 * 60.0 + 0.2 * 100.0)
+
+    def test_compute_source_reliability_is_cached_until_update(self):
+        first = compute_source_reliability(self.source)
+        FactCheckResult.objects.create(article=self.articles[2], claim='c4', rating='true', explanation='')
+        with self.assertNumQueries(0):
+            self.assertEqual(compute_source_reliability(self.source), first)
+        updated = update_source_reliability(self.source)
+        self.assertGreater(updated, first)
+        self.assertEqual(compute_source_reliability(self.source), updated)
+
+    def test_failed_computation_falls_back_without_caching(self):
+        self.source.reliability_score = 73.0
+        with patch('news_analysis.models.FactCheckResult.objects.filter', side_effect=DatabaseError):
+            self.assertEqual(compute_source_reliability(self.source), 73.0)
+            self.assertEqual(update_source_reliability(self.source), 73.0)
+        self.source.refresh_from_db()
+        self.assertEqual(self.source.reliability_score, 0.0)
+        # The next call recomputes instead of serving the fallback
+        self.assertNotEqual(compute_source_reliability(self.source), 73.0)
+
+    def test_update_source_reliability_persists(self):
+        score = update_source_reliability(self.source)
+        self.source.refresh_from_db()
+        self.assertAlmostEqual(self.source.reliability_score, score)
@@ -2,17 +2,73 @@
 Utility functions for news aggregation and article handling.
 """
 import re
+import heapq
+import hashlib
 import logging
 import requests
+from requests.adapters import HTTPAdapter
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from html import escape
+import lxml.html
+from lxml import etree
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+# Shared session so repeated URL checks and article downloads reuse pooled
+# keep-alive connections instead of paying a TCP/TLS handshake per request
+_HTTP_SESSION = requests.Session()
+_HTTP_ADAPTER = HTTPAdapter(pool_connections=32, pool_maxsize=64)
+_HTTP_SESSION.mount('http://', _HTTP_ADAPTER)
+_HTTP_SESSION.mount('https://', _HTTP_ADAPTER)
+
+# Elements clean_html drops along with their contents
+_STRIP_TAGS = frozenset({'script', 'style', 'iframe', 'meta', 'noscript'})
+
+# Netloc of plain http(s) URLs; anything unusual (whitespace, IPv6 brackets) falls back to urlparse
+_HTTP_NETLOC_RE = re.compile(r'^https?://([^/?#\s\[\]]*)(?=[/?#]|$)', re.IGNORECASE)
+
+# Input clean_html treats as a full document (optionally behind an XML
+# declaration or comments); anything else is cleaned as a fragment
+_FULL_HTML_RE = re.compile(r'\A\s*(?:<\?xml[^>]*>\s*)?(?:<!--.*?-->\s*)*<(!doctype|html)\b', re.IGNORECASE | re.DOTALL)
+
+# Image URLs that are almost never the article's main image
+_SKIP_IMAGE_RE = re.compile(r'icon|logo|spacer|advertisement', re.IGNORECASE)
+
+# Seconds clean_html/extract_main_image results are reused for identical HTML (re-crawls)
+HTML_CACHE_TIMEOUT = 3600
+
+# Distinguishes a cache miss from a cached None (page without a usable image)
+_CACHE_MISS = object()
+
+
+def _html_cache_key(prefix, html_content):
+    digest = hashlib.blake2b(html_content.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+    return f'news_aggregator:{prefix}:{digest}'
+
+
+def _parse_html(html_content):
+    """
+    Parse an HTML string into an lxml document. The text is handed to lxml as
+    UTF-8 bytes because lxml rejects str input that starts with an XML
+    encoding declaration (<?xml ... encoding="UTF-8"?>), as XHTML pages do.
+    lxml parsers must not be shared between threads, so each call builds one.
+    """
+    return lxml.html.document_fromstring(
+        html_content.encode('utf-8', 'replace'),
+        parser=lxml.html.HTMLParser(encoding='utf-8'),
+    )
+
+
 def clean_html(html_content):
     """
     Clean HTML content by removing scripts, styles, and other unwanted elements.
+    Results are cached by a hash of the HTML for HTML_CACHE_TIMEOUT seconds.
 
     Args:
         html_content (str): Raw HTML content
@@ -23,18 +79,44 @@ def clean_html(html_content):
     if not html_content:
         return ""
 
-    # Parse HTML
-    soup = BeautifulSoup(html_content, 'html.parser')
+    key = _html_cache_key('clean_html', html_content)
+    cleaned = cache.get(key)
+    if cleaned is None:
+        cleaned = _clean_html(html_content)
+        cache.set(key, cleaned, HTML_CACHE_TIMEOUT)
+    return cleaned
+
+
+def _clean_html(html_content):
+    """Uncached implementation of clean_html."""
+    if not html_content.strip():
+        return ""
+
+    # Parse HTML; only serialization is needed, so work on the lxml tree directly.
+    # Fragments are parsed inside an explicit body and come back unwrapped
+    full_document = _FULL_HTML_RE.match(html_content)
+    markup = html_content if full_document else f'<html><body>{html_content}</body></html>'
+    try:
+        root = _parse_html(markup)
+    except etree.ParserError:
+        # Otherwise empty documents
+        return ""
 
-    # Remove scripts, styles, and comments
-    for element in soup(['script', 'style', 'iframe', 'meta', 'noscript']):
-        element.decompose()
+    # Remove scripts, styles, and comments in a single pass, keeping trailing text
+    etree.strip_elements(root, etree.Comment, *_STRIP_TAGS, with_tail=False)
 
-    # Remove comment nodes
-    for comment in soup.findAll(text=lambda text: isinstance(text, str) and text.strip().startswith('<!--')):
-        comment.extract()
+    if not full_document:
+        body = root.body
+        return escape(body.text or '', quote=False) + ''.join(
+            lxml.html.tostring(child, encoding='unicode') for child in body
+        )
 
-    return str(soup)
+    cleaned = lxml.html.tostring(root, encoding='unicode')
+    # libxml2 only keeps a doctype the input declared when serializing the
+    # whole tree, which would also add a default one to documents without it
+    if full_document.group(1).lower() == '!doctype':
+        cleaned = f'{root.getroottree().docinfo.doctype}\n{cleaned}'
+    return cleaned
 
 def extract_article_content(url, timeout=10):
     """
@@ -49,9 +131,19 @@ def extract_article_content(url, timeout=10):
     """
     try:
         from newspaper import Article, ArticleException
-        # Create and download article
+        # Create and download article; the HTML is fetched through the shared
+        # session so repeated downloads from the same site reuse connections
         article = Article(url)
-        article.download()
+        response = _HTTP_SESSION.get(
+            url,
+            timeout=timeout,
+            headers={'User-Agent': article.config.browser_user_agent},
+        )
+        response.raise_for_status()
+        # Same decoding rule as newspaper: fall back to raw bytes when requests
+        # could only guess the default ISO-8859-1 charset
+        html = response.content if response.encoding == 'ISO-8859-1' else response.text
+        article.download(input_html=html)
         article.parse()
 
         # Extract and process data
@@ -71,6 +163,9 @@ def extract_article_content(url, timeout=10):
             'url': url
         }
 
+    except requests.RequestException as e:
+        logger.error(f"Error downloading article from {url}: {str(e)}")
+        return None
     except ArticleException as e:
         logger.error(f"Error extracting article from {url}: {str(e)}")
         return None
@@ -78,9 +173,32 @@ def extract_article_content(url, timeout=10):
         logger.error(f"Unexpected error extracting article from {url}: {str(e)}")
         return None
 
+def extract_articles_bulk(urls, max_workers=16, timeout=10):
+    """
+    Extract several articles concurrently. Downloads are network-bound, so
+    threads overlap the waiting instead of fetching one URL at a time.
+
+    Args:
+        urls (iterable): URLs of the articles
+        max_workers (int): Maximum number of concurrent downloads
+        timeout (int): Request timeout in seconds, per article
+
+    Returns:
+        list: Results of extract_article_content, in the same order as urls
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+
+    extract = partial(extract_article_content, timeout=timeout)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+        return list(executor.map(extract, urls))
+
+@lru_cache(maxsize=4096)
 def get_domain_from_url(url):
     """
-    Extract the domain from a URL.
+    Extract the domain from a URL. Results are memoized since the same
+    domains recur across articles.
 
     Args:
         url (str): URL to parse
@@ -89,8 +207,8 @@ def get_domain_from_url(url):
         str: Domain name
     """
     try:
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc
+        match = _HTTP_NETLOC_RE.match(url)
+        domain = match.group(1) if match else urlparse(url).netloc
 
         # Remove www. prefix if present
         if domain.startswith('www.'):
@@ -101,19 +219,26 @@ def get_domain_from_url(url):
         logger.error(f"Error extracting domain from {url}: {str(e)}")
         return None
 
-def check_url_accessibility(url, timeout=5):
+def check_url_accessibility(url, timeout=(2, 3)):
     """
-    Check if a URL is accessible.
+    Check if a URL is accessible. Servers that refuse HEAD (403/405) are
+    retried with a GET for the first byte only.
 
     Args:
         url (str): URL to check
-        timeout (int): Request timeout in seconds
+        timeout (float or tuple): Request timeout in seconds, or a
+            (connect, read) pair so a slow server fails on the read timeout
 
     Returns:
         bool: True if URL is accessible, False otherwise
     """
     try:
-        response = requests.head(url, timeout=timeout, allow_redirects=True)
+        response = _HTTP_SESSION.head(url, timeout=timeout, allow_redirects=True)
+        if response.status_code in (403, 405):
+            response = _HTTP_SESSION.get(
+                url, timeout=timeout, allow_redirects=True, headers={'Range': 'bytes=0-0'}, stream=True
+            )
+            response.close()
         return response.status_code < 400
     except requests.RequestException:
         return False
@@ -121,6 +246,7 @@ def check_url_accessibility(url, timeout=5):
 def extract_main_image(html_content, base_url):
     """
     Extract the main image from HTML content.
+    Results are cached by a hash of the HTML for HTML_CACHE_TIMEOUT seconds.
 
     Args:
         html_content (str): HTML content
@@ -132,31 +258,46 @@ def extract_main_image(html_content, base_url):
     if not html_content:
         return None
 
-    soup = BeautifulSoup(html_content, 'html.parser')
+    key = _html_cache_key('main_image', html_content)
+    image_url = cache.get(key, _CACHE_MISS)
+    if image_url is _CACHE_MISS:
+        image_url = _extract_main_image(html_content)
+        cache.set(key, image_url, HTML_CACHE_TIMEOUT)
+    return image_url
 
-    # Try to find meta og:image first
-    og_image = soup.find('meta', property='og:image')
-    if og_image and 'content' in og_image.attrs:
-        return og_image['content']
 
-    # Try to find Twitter image
-    twitter_image = soup.find('meta', {'name': 'twitter:image'})
-    if twitter_image and 'content' in twitter_image.attrs:
-        return twitter_image['content']
+def _extract_main_image(html_content):
+    """Uncached implementation of extract_main_image."""
+    try:
+        root = _parse_html(html_content)
+    except etree.ParserError:
+        return None
 
-    # Look for large images in the content
-    images = soup.find_all('img')
+    # One walk over <meta> and <img> elements. Only the first og:image and the
+    # first twitter:image tags count; og:image wins wherever it appears, then
+    # the Twitter image, then the largest content image (earliest on ties).
+    og_checked = False
+    twitter_image = None
+    best_src = None
+    best_area = 0
+    for el in root.iter('meta', 'img'):
+        if el.tag == 'meta':
+            if not og_checked and el.get('property') == 'og:image':
+                if 'content' in el.attrib:
+                    return el.get('content')
+                og_checked = True
+            if twitter_image is None and el.get('name') == 'twitter:image':
+                twitter_image = el
+            continue
 
-    # Filter and sort images by dimensions, if available
-    valid_images = []
-    for img in images:
+        img = el
         # Skip small or irrelevant images
-        if 'src' not in img.attrs:
+        if 'src' not in img.attrib:
             continue
 
         # Skip icons, spacers, etc.
-        src = img['src']
-        if not src or any(x in src.lower() for x in ['icon', 'logo', 'spacer', 'advertisement']):
+        src = img.get('src')
+        if not src or _SKIP_IMAGE_RE.search(src):
             continue
 
         # Try to get dimensions
@@ -170,15 +311,66 @@ def extract_main_image(html_content, base_url):
         except (ValueError, TypeError):
             area = 0
 
-        valid_images.append((img['src'], area))
+        if best_src is None or area > best_area:
+            best_src = src
+            best_area = area
+
+    if twitter_image is not None and 'content' in twitter_image.attrib:
+        return twitter_image.get('content')
 
-    # Sort by area (descending)
-    valid_images.sort(key=lambda x: x[1], reverse=True)
+    return best_src
 
-    if valid_images:
-        return valid_images[0][0]
+# English stopwords for summarize_text, loaded on first use
+_STOPWORDS = None
+
+# Sentence boundary: terminal punctuation, whitespace, then a capital/digit (optionally quoted)
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+(?=["\'(\u201c\u2018]?[A-Z0-9])')
+
+# Alphanumeric runs; summarize_text only needs a bag of words, not Punkt word tokens
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+@lru_cache(maxsize=None)
+def _ensure_nltk_resource(resource, package):
+    """Download an NLTK data package unless it is installed; checked once per process."""
+    import nltk
+
+    try:
+        nltk.data.find(resource)
+    except LookupError:
+        nltk.download(package)
+
+
+def _get_stopwords():
+    """
+    Return the English stopwords used by summarize_text, loading them once per process.
+
+    Returns:
+        frozenset: English stopwords
+    """
+    global _STOPWORDS
+    if _STOPWORDS is None:
+        from nltk.corpus import stopwords
+
+        _ensure_nltk_resource('corpora/stopwords', 'stopwords')
+        _STOPWORDS = frozenset(stopwords.words('english'))
+    return _STOPWORDS
+
+
+def _split_sentences(text):
+    """
+    Split text into sentences with a regex, or with NLTK Punkt when
+    SUMMARIZE_USE_NLTK_TOKENIZER is enabled.
+    """
+    if getattr(settings, 'SUMMARIZE_USE_NLTK_TOKENIZER', False):
+        from nltk.tokenize import sent_tokenize
+
+        _ensure_nltk_resource('tokenizers/punkt', 'punkt')
+        return sent_tokenize(text)
+
+    text = text.strip()
+    return _SENTENCE_SPLIT_RE.split(text) if text else []
 
-    return None
 
 def summarize_text(text, max_sentences=5):
     """
@@ -193,52 +385,32 @@ def summarize_text(text, max_sentences=5):
     Returns:
         str: Summary text
     """
-    import nltk
-    from nltk.tokenize import sent_tokenize
-    from nltk.corpus import stopwords
-
-    try:
-        nltk.data.find('punkt')
-    except LookupError:
-        nltk.download('punkt')
-
-    try:
-        nltk.data.find('stopwords')
-    except LookupError:
-        nltk.download('stopwords')
-
     # Tokenize text into sentences
-    sentences = sent_tokenize(text)
+    sentences = _split_sentences(text)
 
     # If text is already short, return as is
     if len(sentences) <= max_sentences:
         return text
 
-    # Get stopwords
-    stop_words = set(stopwords.words('english'))
+    stop_words = _get_stopwords()
+
+    # Tokenize each sentence once; the tokens feed both frequency and scoring
+    sentence_tokens = [_WORD_RE.findall(sentence.lower()) for sentence in sentences]
 
     # Calculate word frequency (excluding stopwords)
-    word_freq = {}
-    for sentence in sentences:
-        for word in nltk.word_tokenize(sentence.lower()):
-            if word not in stop_words and word.isalnum():
-                if word in word_freq:
-                    word_freq[word] += 1
-                else:
-                    word_freq[word] = 1
+    word_freq = Counter(
+        word
+        for tokens in sentence_tokens
+        for word in tokens
+        if word not in stop_words
+    )
 
     # Calculate sentence scores based on word frequency
-    sentence_scores = {}
-    for i, sentence in enumerate(sentences):
-        score = 0
-        for word in nltk.word_tokenize(sentence.lower()):
-            if word in word_freq:
-                score += word_freq[word]
-        sentence_scores[i] = score
-
-    # Get the top sentences
-    top_sentence_indices = sorted(sentence_scores.items(), key=lambda x: x[1], reverse=True)[:max_sentences]
-    top_sentence_indices = sorted([idx for idx, _ in top_sentence_indices])
+    sentence_scores = [sum(word_freq[word] for word in tokens) for tokens in sentence_tokens]
+
+    # Get the top sentences (nlargest keeps the earlier sentence on ties, like a stable sort)
+    top_sentence_indices = heapq.nlargest(max_sentences, range(len(sentences)), key=sentence_scores.__getitem__)
+    top_sentence_indices.sort()
 
     # Create summary
     summary_sentences = [sentences[i] for i in top_sentence_indices]
@@ -249,22 +421,45 @@ def summarize_text(text, max_sentences=5):
 
 # --- Reliability Scoring ---
 
+# Seconds a computed reliability score is reused before hitting the database again
+RELIABILITY_CACHE_TIMEOUT = 300
+
+
+def _reliability_cache_key(source_id):
+    return f'news_aggregator:source_reliability:{source_id}'
+
+
 def compute_source_reliability(source):
     """Compute a 0..100 reliability score for a NewsSource based on related article analyses.
     Factors:
       - Fact-check ratings (weighted by confidence) → 60%
       - Bias consistency (lower stdev of bias_score is better) → 20%
       - Logical fallacy frequency (fewer per article is better) → 20%
+    Results are cached for RELIABILITY_CACHE_TIMEOUT seconds; update_source_reliability
+    always recomputes and refreshes the cached value. If the computation fails, the
+    stored reliability_score is returned and nothing is cached.
     """
+    key = _reliability_cache_key(source.pk)
+    score = cache.get(key)
+    if score is None:
+        score = _compute_source_reliability(source)
+        if score is None:
+            return float(source.reliability_score or 0.0)
+        cache.set(key, score, RELIABILITY_CACHE_TIMEOUT)
+    return score
+
+
+def _compute_source_reliability(source):
+    """Uncached implementation of compute_source_reliability; None if it failed."""
     try:
         from news_analysis.models import FactCheckResult, BiasAnalysis, LogicalFallacyDetection
-        from django.db.models import Avg, Count
-        import statistics
+        from django.db.models import Avg, Case, Count, FloatField, StdDev, Value, When
 
-        articles = list(source.articles.all())
-        if not articles:
+        # Kept as a subquery so the filters below don't ship an IN (...) list of ids
+        article_ids = source.articles.values('id')
+        article_count = article_ids.count()
+        if not article_count:
             return 0.0
-        article_ids = [a.id for a in articles]
 
         # Fact-check score
         fc_qs = FactCheckResult.objects.filter(article_id__in=article_ids)
@@ -277,27 +472,32 @@ def compute_source_reliability(source):
             'pants_on_fire': 0.0,
             'unverified': 0.5,
         }
-        fc_scores = []
-        for fc in fc_qs.iterator():
-            base = rating_weight.get(fc.rating, 0.5)
-            conf = fc.confidence if (fc.confidence is not None) else 0.7
-            fc_scores.append(base * conf + base * (1 - conf))  # keep base; weight is gentle
-        fact_part = (sum(fc_scores) / len(fc_scores) * 100.0) if fc_scores else 50.0
+        # Confidence keeps the base weight (base * conf + base * (1 - conf)), so
+        # the score is the mean rating weight, computed in the database
+        rating_case = Case(
+            *[When(rating=rating, then=Value(weight)) for rating, weight in rating_weight.items()],
+            default=Value(0.5),
+            output_field=FloatField(),
+        )
+        fact_avg = fc_qs.aggregate(avg=Avg(rating_case))['avg']
+        fact_part = (fact_avg * 100.0) if fact_avg is not None else 50.0
 
         # Bias consistency: lower stdev => higher score
-        bias_scores = list(BiasAnalysis.objects.filter(article_id__in=article_ids).values_list('bias_score', flat=True))
-        if len(bias_scores) >= 2:
-            sigma = statistics.pstdev(bias_scores)
-            sigma = min(max(sigma, 0.0), 1.0)
+        bias_stats = BiasAnalysis.objects.filter(article_id__in=article_ids).aggregate(
+            count=Count('id'),
+            sigma=StdDev('bias_score'),
+        )
+        if bias_stats['count'] >= 2:
+            sigma = min(max(bias_stats['sigma'], 0.0), 1.0)
             bias_consistency = (1.0 - sigma) * 100.0
-        elif len(bias_scores) == 1:
+        elif bias_stats['count'] == 1:
             bias_consistency = 85.0
         else:
             bias_consistency = 60.0
 
         # Fallacy penalty: avg fallacies per article, max penalty 20 at >=3/article
         fallacy_count = LogicalFallacyDetection.objects.filter(article_id__in=article_ids).count()
-        avg_fallacies = fallacy_count / max(len(articles), 1)
+        avg_fallacies = fallacy_count / article_count
         fallacy_penalty = min(avg_fallacies / 3.0, 1.0) * 20.0
         fallacy_component = max(0.0, 100.0 - fallacy_penalty)
 
@@ -305,12 +505,17 @@ def compute_source_reliability(source):
         score = 0.6 * fact_part + 0.2 * bias_consistency + 0.2 * fallacy_component
         return max(0.0, min(100.0, score))
     except Exception:
-        return float(source.reliability_score or 0.0)
+        return None
 
 
 def update_source_reliability(source):
     """Compute and persist reliability score for a source."""
-    score = compute_source_reliability(source)
+    # Called after new analyses are stored, so bypass the cache and refresh it
+    score = _compute_source_reliability(source)
+    if score is None:
+        # Keep the stored score and don't cache the failure
+        return float(source.reliability_score or 0.0)
+    cache.set(_reliability_cache_key(source.pk), score, RELIABILITY_CACHE_TIMEOUT)
     # Avoid unnecessary writes
     if abs((source.reliability_score or 0.0) - score) >= 1e-6:
         source.reliability_score = score
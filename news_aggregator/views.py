@@ -1,10 +1,51 @@
+import hashlib
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.cache import cache
 from django.core.paginator import Paginator
 from django.db.models import Q
+from django.db.models.functions import Substr
 from django.http import JsonResponse
-from .models import NewsArticle, NewsSource, UserSavedArticle
+from .pagination import RotatedRows, WindowCountPaginator
+from .models import (
+    SOURCE_CHOICES_CACHE_KEY,
+    SOURCE_CHOICES_CACHE_TIMEOUT,
+    SOURCE_RECENT_IDS_CACHE_TIMEOUT,
+    NewsArticle,
+    NewsSource,
+    UserSavedArticle,
+    random_bucket,
+    source_recent_ids_cache_key,
+)
+
+# Session key holding where the 'diverse' feed starts its bucket rotation
+DIVERSE_OFFSET_SESSION_KEY = 'news_aggregator:diverse_offset'
+
+def _for_article_cards(articles):
+    """
+    Trim an article queryset to what the list cards render. The full content
+    is deferred; cards only fall back to its first 30 words when there is no
+    summary, so just a prefix is loaded as content_preview.
+    """
+    return articles.defer('content').annotate(content_preview=Substr('content', 1, 1000))
+
+def _get_source_choices():
+    """
+    Sources for the filter dropdown and a version digest of them. The list
+    rarely changes, so it is cached until a source is added, renamed or
+    removed. The version keys the template's rendered dropdown fragment.
+    """
+    choices = cache.get(SOURCE_CHOICES_CACHE_KEY)
+    if choices is None:
+        sources = list(NewsSource.objects.only('id', 'name').order_by('name'))
+        version = hashlib.blake2b(
+            repr([(source.id, source.name) for source in sources]).encode(), digest_size=8
+        ).hexdigest()
+        choices = (version, sources)
+        cache.set(SOURCE_CHOICES_CACHE_KEY, choices, SOURCE_CHOICES_CACHE_TIMEOUT)
+    return choices
 
 def latest_news(request):
     """View to display the latest news articles with filters"""
@@ -12,8 +53,11 @@ def latest_news(request):
     source_id = request.GET.get('source')
     search_query = request.GET.get('q')
     
-    # Start with all articles
-    articles = NewsArticle.objects.all()
+    # Start with all articles; each card shows its source and analysis badges,
+    # so join them into the page query instead of one lookup per card
+    articles = _for_article_cards(
+        NewsArticle.objects.select_related('source', 'bias_analysis', 'sentiment_analysis')
+    )
     
     # Apply filters if provided
     if source_id:
@@ -21,63 +65,79 @@ def latest_news(request):
     if search_query:
         articles = articles.filter(Q(title__icontains=search_query) | Q(content__icontains=search_query))
     
-    # Apply political balance filter if user is authenticated and has preferences
-    if request.user.is_authenticated and hasattr(request.user, 'preferences'):
-        political_filter = request.user.preferences.political_filter
-        
-        if political_filter == 'neutral_only':
-            # Show only articles from sources with neutral bias (-0.2 to 0.2)
-            articles = articles.filter(
-                Q(political_bias__isnull=True) |  # Include unanalyzed articles
-                Q(political_bias__gte=-0.2, political_bias__lte=0.2) |
-                Q(source__political_bias__gte=-0.2, source__political_bias__lte=0.2)
-            )
-        elif political_filter == 'diverse':
-            # Show a mix of left, right, and center articles
-            # This is a simplified example - you might want to make this more sophisticated
-            articles = articles.order_by('?')  # Random order for diversity
-        # 'all' and 'balanced' don't need special filtering
+    # Flag saved articles in the page query itself
+    articles = articles.with_is_saved(request.user)
+
+    # Apply political balance filter if user is authenticated and has preferences.
+    # The preferences row is read once here (the auth backend already joins it)
+    prefs = getattr(request.user, 'preferences', None) if request.user.is_authenticated else None
+    political_filter = prefs.political_filter if prefs is not None else None
+    if political_filter == 'neutral_only':
+        # Show only unanalyzed articles and articles with a neutral bias (-0.2 to 0.2)
+        # of their own or from their source; precomputed in NewsArticle.is_neutral
+        articles = articles.filter(is_neutral=True)
+    elif political_filter == 'diverse':
+        # Show a mix of left, right, and center articles
+        # This is a simplified example - you might want to make this more sophisticated
+        # Articles carry a random bucket from creation, so the shuffle is a
+        # rotation of the buckets instead of ORDER BY RANDOM(). Each session
+        # starts the rotation at its own offset, so pages stay stable while
+        # browsing and every session sees a different order. Both halves of
+        # the rotation are ranges on the (random_bucket, -published_date) index
+        offset = request.session.get(DIVERSE_OFFSET_SESSION_KEY)
+        if offset is None:
+            offset = request.session[DIVERSE_OFFSET_SESSION_KEY] = random_bucket()
+        articles = RotatedRows(articles, 'random_bucket', offset, '-published_date')
+    # 'all' and 'balanced' don't need special filtering
 
     # Default ordering for non-diverse views
-    if not (request.user.is_authenticated and hasattr(request.user, 'preferences') and 
-            request.user.preferences.political_filter == 'diverse'):
+    if political_filter != 'diverse':
         articles = articles.order_by('-published_date')
-    
+
     # Get all sources for the filter dropdown
-    sources = NewsSource.objects.all()
+    sources_version, sources = _get_source_choices()
     
-    # Paginate the results
-    paginator = Paginator(articles, 12)  # Show 12 articles per page
+    # Paginate the results; RotatedRows is not a queryset, so it gets the plain paginator
+    paginator_class = Paginator if political_filter == 'diverse' else WindowCountPaginator
+    paginator = paginator_class(articles, 12)  # Show 12 articles per page
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
-    if request.user.is_authenticated:
-        # Create a set of saved article IDs for efficient lookup
-        saved_article_ids = set(request.user.saved_articles.values_list('article_id', flat=True))
-        
-        # Add a saved flag to each article
-        for article in page_obj:
-            article.is_saved = article.id in saved_article_ids
-    
     context = {
         'page_obj': page_obj,
         'sources': sources,
+        'sources_version': sources_version,
         'selected_source': source_id,
         'search_query': search_query,
     }
     return render(request, 'news_aggregator/latest_news.html', context)
 
+def _get_related_articles(article, limit=5):
+    """
+    Latest articles from the same source, excluding the given one. The ids of
+    the source's newest limit + 1 articles are cached until one of its
+    articles is saved or deleted, so only a primary key lookup runs per view.
+    """
+    key = source_recent_ids_cache_key(article.source_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = list(
+            NewsArticle.objects.filter(source_id=article.source_id)
+            .order_by('-published_date')
+            .values_list('id', flat=True)[:limit + 1]
+        )
+        cache.set(key, ids, SOURCE_RECENT_IDS_CACHE_TIMEOUT)
+    ids = [pk for pk in ids if pk != article.pk][:limit]
+    return NewsArticle.objects.filter(pk__in=ids).order_by('-published_date')
+
 def article_detail(request, article_id):
     """View to display a single news article with analysis"""
-    article = get_object_or_404(NewsArticle, pk=article_id)
-    # Check if the user has saved this article
-    user_saved = False
-    if request.user.is_authenticated:
-        user_saved = UserSavedArticle.objects.filter(user=request.user, article=article).exists()
+    # Check if the user has saved this article as part of the article query
+    articles = NewsArticle.objects.with_fallacy_detections().with_is_saved(request.user)
+    article = get_object_or_404(articles, pk=article_id)
+    user_saved = getattr(article, 'is_saved', False)
     
-    # Get related articles from the same source
-    related_articles = NewsArticle.objects.filter(source=article.source)\
-        .exclude(pk=article.pk).order_by('-published_date')[:5]
+    related_articles = _get_related_articles(article)
     
     context = {
         'article': article,
@@ -104,21 +164,17 @@ def source_detail(request, source_id):
     """View to display a single news source with its articles"""
     source = get_object_or_404(NewsSource, pk=source_id)
 
-    # Get all articles from this source
-    articles = source.articles.all().order_by('-published_date')
+    # Get all articles from this source; newest first walks the (source, -published_date) index
+    articles = _for_article_cards(source.articles.order_by('-published_date'))
+
+    # Mark saved state for each article to persist across refresh
+    articles = articles.with_is_saved(request.user)
 
     # Paginate the results
-    paginator = Paginator(articles, 12)  # Show 12 articles per page
+    paginator = WindowCountPaginator(articles, 12)  # Show 12 articles per page
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
-    # Mark saved state for each article to persist across refresh
-    if request.user.is_authenticated:
-        # Create a set of saved article IDs for efficient lookup
-        saved_article_ids = set(request.user.saved_articles.values_list('article_id', flat=True))
-        for a in page_obj:
-            a.is_saved = a.id in saved_article_ids
-
     context = {
         'source': source,
         'page_obj': page_obj,
@@ -128,39 +184,32 @@ def source_detail(request, source_id):
 @login_required
 def save_article(request, article_id):
     """View to save or unsave an article for the logged-in user"""
-    article = get_object_or_404(NewsArticle, pk=article_id)
+    # Only the title is shown in the flash message
+    article = get_object_or_404(NewsArticle.objects.only('title'), pk=article_id)
     
-    # Check if the article is already saved
-    saved_article = UserSavedArticle.objects.filter(user=request.user, article=article)
+    # Try to remove it (unsave); the DELETE's row count tells whether it was saved
+    deleted, _ = UserSavedArticle.objects.filter(user=request.user, article_id=article_id).delete()
     
-    if saved_article.exists():
-        # If it exists, remove it (unsave)
-        saved_article.delete()
+    if deleted:
         messages.success(request, f'Article "{article.title}" removed from your saved articles.')
     else:
-        # If it doesn't exist, create it (save)
-        UserSavedArticle.objects.create(user=request.user, article=article)
+        # If it wasn't saved, create it (save); get_or_create absorbs a concurrent
+        # duplicate click instead of failing on the (user, article) unique index
+        UserSavedArticle.objects.get_or_create(user=request.user, article=article)
         messages.success(request, f'Article "{article.title}" saved to your collection.')
     
-    # Redirect back to the referring page or article detail
-    next_url = request.GET.get('next', '')
-    
-    # Handle different next url destinations
-    if next_url == 'news_aggregator:article_detail':
-        return redirect('news_aggregator:article_detail', article_id=article.id)
-    elif next_url == 'news_aggregator:source_detail':
-        source_id = request.GET.get('source_id')
-        if source_id:
-            return redirect('news_aggregator:source_detail', source_id=source_id)
-        else:
-            return redirect('news_aggregator:source_list')
-    elif next_url == 'news_aggregator:latest':
-        return redirect('news_aggregator:latest')
-    elif next_url == 'news_analysis:article_analysis':
-        return redirect('news_analysis:article_analysis', article_id=article.id)
-    else:
-        # Default to article detail page if no valid next URL
-        return redirect('news_aggregator:article_detail', article_id=article.id)
+    # Redirect back to the referring page, defaulting to the article detail page
+    source_id = request.GET.get('source_id')
+    redirects = {
+        'news_aggregator:article_detail': lambda: redirect('news_aggregator:article_detail', article_id=article_id),
+        'news_aggregator:source_detail': lambda: (
+            redirect('news_aggregator:source_detail', source_id=source_id) if source_id
+            else redirect('news_aggregator:source_list')
+        ),
+        'news_aggregator:latest': lambda: redirect('news_aggregator:latest'),
+        'news_analysis:article_analysis': lambda: redirect('news_analysis:article_analysis', article_id=article_id),
+    }
+    return redirects.get(request.GET.get('next'), redirects['news_aggregator:article_detail'])()
 
 
 @login_required
@@ -179,14 +228,13 @@ def save_article_ajax(request):
     except NewsArticle.DoesNotExist:
         return JsonResponse({'error': 'Article not found'}, status=404)
     
-    # Check if the article is already saved
-    saved_article = UserSavedArticle.objects.filter(user=request.user, article=article)
+    # Try to remove it (unsave); the DELETE's row count tells whether it was saved
+    deleted, _ = UserSavedArticle.objects.filter(user=request.user, article=article).delete()
     
-    if saved_article.exists():
-        # If it exists, remove it (unsave)
-        saved_article.delete()
+    if deleted:
         return JsonResponse({'saved': False, 'message': 'Article removed from your saved list'})
     else:
-        # If it doesn't exist, create it (save)
-        UserSavedArticle.objects.create(user=request.user, article=article)
+        # If it wasn't saved, create it (save); get_or_create absorbs a concurrent
+        # duplicate click instead of failing on the (user, article) unique index
+        UserSavedArticle.objects.get_or_create(user=request.user, article=article)
         return JsonResponse({'saved': True, 'message': 'Article saved to your collection'})
@@ -1,4 +1,4 @@
-from django.test import TestCase, override_settings
+from django.test import SimpleTestCase, TestCase, override_settings
 from django.core import mail
 from django.contrib.auth.models import User
 from accounts.models import UserPreferences
@@ -8,16 +8,17 @@ from .email_utils import get_opted_in_recipient_emails, send_misinformation_aler
 
 @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend', DEFAULT_FROM_EMAIL='test@example.com')
 class MisinformationEmailTests(TestCase):
-    def setUp(self):
-        self.user1 = User.objects.create_user(username='u1', email='u1@example.com', password='x')
-        self.user2 = User.objects.create_user(username='u2', email='u2@example.com', password='x')
-        self.user3 = User.objects.create_user(username='u3', email='', password='x')
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = User.objects.create_user(username='u1', email='u1@example.com', password='x')
+        cls.user2 = User.objects.create_user(username='u2', email='u2@example.com', password='x')
+        cls.user3 = User.objects.create_user(username='u3', email='', password='x')
         # Ensure preferences exist
-        UserPreferences.objects.filter(user=self.user1).update(receive_misinformation_alerts=True)
-        UserPreferences.objects.filter(user=self.user2).update(receive_misinformation_alerts=False)
-        UserPreferences.objects.filter(user=self.user3).update(receive_misinformation_alerts=True)
+        UserPreferences.objects.filter(user=cls.user1).update(receive_misinformation_alerts=True)
+        UserPreferences.objects.filter(user=cls.user2).update(receive_misinformation_alerts=False)
+        UserPreferences.objects.filter(user=cls.user3).update(receive_misinformation_alerts=True)
 
-        self.alert = MisinformationAlert.objects.create(
+        cls.alert = MisinformationAlert.objects.create(
             title='Test Alert',
             description='Test description',
             severity='high',
@@ -45,21 +46,24 @@ from django.test import TestCase
 # Create your tests here.
 
 
-from django.test import Client
 from django.core.management import call_command
-from news_aggregator.models import NewsSource, NewsArticle
+from news_aggregator.models import NewsSource, NewsArticle, UserSavedArticle
+
+
+def create_test_article(title, content, url='https://example.com/a1'):
+    """Create a NewsArticle on a fresh 'Test Source' (call from setUpTestData)."""
+    source = NewsSource.objects.create(name='Test Source', url='https://example.com')
+    return NewsArticle.objects.create(title=title, source=source, url=url, content=content)
+
 
 class MisinformationIntegrationTests(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.source = NewsSource.objects.create(name='Test Source', url='https://example.com')
-        self.article = NewsArticle.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.article = create_test_article(
             title='Big Health Claim Goes Viral',
-            source=self.source,
-            url='https://example.com/a1',
             content='A viral claim about health and wellness is circulating widely.',
         )
-        self.alert = MisinformationAlert.objects.create(
+        cls.alert = MisinformationAlert.objects.create(
             title='Viral Health Claim',
             description='A known misleading claim related to health.',
             severity='high',
@@ -92,15 +96,25 @@ class MisinformationIntegrationTests(TestCase):
         self.assertContains(resp, 'Misinformation Alerts')
         self.assertContains(resp, 'Viral Health Claim')
 
+    def test_article_analysis_page_flags_saved_article(self):
+        url = f"/analysis/article-analysis/{self.article.id}/"
+        self.assertIs(self.client.get(url).context['is_saved'], False)
+
+        user = User.objects.create_user(username='analysis-reader', password='x')
+        self.client.force_login(user)
+        self.assertIs(self.client.get(url).context['is_saved'], False)
+        UserSavedArticle.objects.create(user=user, article=self.article)
+        self.assertIs(self.client.get(url).context['is_saved'], True)
+
 
 from unittest.mock import patch
 from django.core.management import call_command
-from news_aggregator.models import NewsArticle, NewsSource
 from news_analysis.models import FactCheckResult
 from news_analysis import utils as analysis_utils
 
 
-class ClaimExtractionTests(TestCase):
+class ClaimExtractionTests(SimpleTestCase):
+    # extract_claims is a pure text function, so no database is needed
     def setUp(self):
         self.content = (
             'The World Health Organization said on Monday that global life expectancy rose by 6 years since 2000. '
@@ -115,11 +129,10 @@ class ClaimExtractionTests(TestCase):
 
 
 class FactCheckPipelineTests(TestCase):
-    def setUp(self):
-        self.source = NewsSource.objects.create(name="Test Source", url="https://example.com")
-        self.article = NewsArticle.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.article = create_test_article(
             title="WHO: life expectancy rose by 6 years since 2000",
-            source=self.source,
             url="https://example.com/article1",
             content=(
                 'The World Health Organization said on Monday that global life expectancy rose by 6 years since 2000. '
@@ -1,4 +1,4 @@
-from django.test import TestCase, Client
+from django.test import TestCase
 from django.urls import reverse
 from unittest.mock import patch
 from news_aggregator.models import NewsSource, NewsArticle
@@ -7,18 +7,20 @@ from news_analysis.utils import detect_logical_fallacies_with_ai
 
 
 class LogicalFallaciesTests(TestCase):
-    def setUp(self):
-        self.client = Client()
-        self.source = NewsSource.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.source = NewsSource.objects.create(
             name="Test Source",
             url="https://example.com",
         )
-        self.article = NewsArticle.objects.create(
+        cls.article = NewsArticle.objects.create(
             title="Test Article",
-            source=self.source,
+            source=cls.source,
             url="https://example.com/article",
             content="This is a test content that might include some fallacious reasoning.",
         )
+        cls.fallacies_url = reverse("news_analysis:fallacies")
+        cls.article_analysis_url = reverse("news_analysis:article_analysis", args=[cls.article.id])
 
     def test_catalog_seeded(self):
         # Data migration should have populated common fallacies
@@ -40,8 +42,7 @@ class LogicalFallaciesTests(TestCase):
         self.assertEqual(det["end_char"], 25)
 
     def test_fallacies_reference_view(self):
-        url = reverse("news_analysis:fallacies")
-        resp = self.client.get(url)
+        resp = self.client.get(self.fallacies_url)
         self.assertEqual(resp.status_code, 200)
         # Page lists fallacies and shows a heading
         self.assertContains(resp, "Logical Fallacies")
@@ -56,8 +57,7 @@ class LogicalFallaciesTests(TestCase):
         if not fallacy:
             fallacy = LogicalFallacy.objects.create(name="Test Fallacy", slug="test-fallacy")
         LogicalFallacyDetection.objects.create(article=self.article, fallacy=fallacy, confidence=0.75)
-        url = reverse("news_analysis:article_analysis", args=[self.article.id])
-        resp = self.client.get(url)
+        resp = self.client.get(self.article_analysis_url)
         self.assertEqual(resp.status_code, 200)
         self.assertContains(resp, "Logical Fallacies")
         self.assertContains(resp, fallacy.name)
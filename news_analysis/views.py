@@ -2,7 +2,7 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
 from django.db.models import Count, Q
-from news_aggregator.models import NewsArticle, UserSavedArticle
+from news_aggregator.models import NewsArticle
 from .models import BiasAnalysis, SentimentAnalysis, FactCheckResult, MisinformationAlert, LogicalFallacy, LogicalFallacyDetection
 from .utils import analyze_sentiment, extract_named_entities, calculate_readability_score, extract_main_topics
 
@@ -87,7 +87,9 @@ def fact_check(request, article_id):
 
 def article_analysis(request, article_id):
     """Comprehensive view to display all analysis for a specific article"""
-    article = get_object_or_404(NewsArticle, pk=article_id)
+    # Check if the user has saved this article as part of the article query
+    articles = NewsArticle.objects.with_fallacy_detections().with_is_saved(request.user)
+    article = get_object_or_404(articles, pk=article_id)
 
     # Get analysis data if it exists
     try:
@@ -103,11 +105,6 @@ def article_analysis(request, article_id):
     # Get fact checks if they exist
     fact_checks = FactCheckResult.objects.filter(article=article)
 
-    # Check if user has saved this article
-    is_saved = False
-    if request.user.is_authenticated:
-        is_saved = UserSavedArticle.objects.filter(user=request.user, article=article).exists()
-
     # Get related articles (same source, similar topics)
     related_articles = NewsArticle.objects.filter(
         Q(source=article.source) |
@@ -123,7 +120,7 @@ def article_analysis(request, article_id):
         'bias_analysis': bias_analysis,
         'sentiment_analysis': sentiment_analysis,
         'fact_checks': fact_checks,
-        'is_saved': is_saved,
+        'is_saved': getattr(article, 'is_saved', False),
         'related_articles': related_articles,
         'misinformation_alerts': related_alerts,
     }